@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-Quick environment check: verifies key packages and prints versions and basic system info.
+Quick environment check: prints package versions and basic system info.
+Light packages (yaml, numpy, PIL, psutil) are imported to verify they load; the heavy ones
+(ultralytics, torch, cv2) are only looked up in installed package metadata, so a broken install
+(e.g. cv2 missing libGL) still shows a version here. torch is imported in the CUDA section below.
 Run:
   python check_env.py
 """
@@ -9,6 +12,7 @@ from __future__ import annotations
 import os
 import shutil
 import sys
+from importlib.metadata import PackageNotFoundError, version
 
 print("Python:", sys.version)
 
@@ -20,14 +24,31 @@ except Exception as e:
     print("Disk check error:", e)
 
 # Imports and versions
+# heavy module -> distribution names that may provide it (read from metadata, not imported)
+pkg_map = {
+    "ultralytics": ["ultralytics"],
+    "torch": ["torch"],
+    "cv2": ["opencv-python-headless", "opencv-python", "opencv-contrib-python-headless", "opencv-contrib-python"],
+}
 mods = {}
 for name in ["yaml", "ultralytics", "torch", "cv2", "numpy", "PIL", "psutil"]:
-    try:
-        m = __import__(name if name != "PIL" else "PIL")
-        ver = getattr(m, "__version__", getattr(getattr(m, "__about__", object), "__version__", "unknown"))
-        mods[name] = ver
-    except Exception as e:
-        mods[name] = f"ERROR: {e}"
+    if name not in pkg_map:
+        try:
+            m = __import__(name)
+            ver = getattr(m, "__version__", getattr(getattr(m, "__about__", object), "__version__", "unknown"))
+            mods[name] = ver
+        except Exception as e:
+            mods[name] = f"ERROR: {e}"
+        continue
+    dists = pkg_map[name]
+    for dist in dists:
+        try:
+            mods[name] = version(dist)
+            break
+        except PackageNotFoundError:
+            continue
+    else:
+        mods[name] = f"ERROR: not installed (no package metadata for {' / '.join(dists)})"
 
 print("\nPackages:")
 for k, v in mods.items():
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+YAML config loading shared by train.py, test.py and finetune.py (and the parse cache
+also used by merge_datasets.py).
+"""
+from __future__ import annotations
+import copy
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+try:
+    import yaml  # PyYAML
+except Exception:
+    # merge_datasets.py has its own fallback parser; load_config reports the missing package
+    yaml = None
+
+# Prefer the libyaml C loader when PyYAML was built with it (also used by merge_datasets.py)
+if yaml:
+    _Loader = yaml.CSafeLoader if hasattr(yaml, "CSafeLoader") else yaml.SafeLoader
+else:
+    _Loader = None
+
+# Parsed files keyed by (absolute path, parser); entries are invalidated by (mtime_ns, size)
+_PARSE_CACHE_MAXSIZE = 100
+_parse_cache: "OrderedDict[tuple[str, Callable], tuple[int, int, Any]]" = OrderedDict()
+
+
+def load_cached(path: str, parse: Callable[[str, os.stat_result], Any]) -> Any:
+    key = (os.path.abspath(path), parse)
+    st = os.stat(key[0])
+    cached = _parse_cache.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        _parse_cache.move_to_end(key)
+        return copy.deepcopy(cached[2])
+    data = parse(key[0], st)
+    _parse_cache[key] = (st.st_mtime_ns, st.st_size, data)
+    _parse_cache.move_to_end(key)
+    while len(_parse_cache) > _PARSE_CACHE_MAXSIZE:
+        _parse_cache.popitem(last=False)
+    # Callers mutate the returned data (pop/setdefault), so never hand out the cached object
+    return copy.deepcopy(data)
+
+
+def _read_json_sidecar(sidecar: Path, st: os.stat_result) -> dict | None:
+    # The sidecar records the YAML's mtime/size; any edit to the YAML invalidates it
+    try:
+        with sidecar.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("mtime_ns") != st.st_mtime_ns or data.get("size") != st.st_size:
+        return None
+    cfg = data.get("config")
+    return cfg if isinstance(cfg, dict) else None
+
+
+def _write_json_sidecar(sidecar: Path, st: os.stat_result, cfg: dict) -> None:
+    tmp = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+    try:
+        payload = json.dumps({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "config": cfg})
+        # Skip configs JSON can't represent faithfully (non-string keys, dates, ...)
+        if json.loads(payload)["config"] != cfg:
+            return
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, sidecar)
+    except (OSError, TypeError, ValueError):
+        # The sidecar is only an optimisation (e.g. the config dir may be read-only)
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _parse_config(path: str, st: os.stat_result) -> dict:
+    p = Path(path)
+    # A JSON sidecar (<config>.json) written on a previous run loads much faster than YAML
+    sidecar = p.with_name(p.name + ".json")
+    cfg = _read_json_sidecar(sidecar, st)
+    if cfg is None:
+        with p.open("r", encoding="utf-8") as f:
+            cfg = yaml.load(f, Loader=_Loader) or {}
+        if not isinstance(cfg, dict):
+            raise SystemExit("Invalid config format: expected a YAML mapping (dict)")
+        _write_json_sidecar(sidecar, st, cfg)
+    return cfg
+
+
+def load_config(path: str) -> dict:
+    if yaml is None:
+        raise SystemExit("PyYAML is required. Install with 'pip install pyyaml' or 'pip install -r requirements.txt'")
+    p = Path(path)
+    if not p.exists():
+        raise SystemExit(f"Config file not found: {p}")
+    return load_cached(str(p), _parse_config)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Small GPU and training-runtime helpers shared by train.py, test.py and finetune.py.
+"""
+from __future__ import annotations
+import functools
+import os
+
+# Free RAM (GB) required before defaulting to cache='ram'; override with 'cache_min_ram_gb' in the config
+_CACHE_MIN_RAM_GB = 16.0
+
+
+@functools.lru_cache(maxsize=1)
+def cuda_available() -> bool:
+    # torch.cuda.is_available() probes the driver on every call; the answer
+    # does not change within a process, so ask once and reuse it.
+    import torch
+    return torch.cuda.is_available()
+
+
+def resolve_device(cfg: dict) -> None:
+    # Only 'auto' needs a CUDA probe; a pinned device never imports torch from here
+    if str(cfg.get("device", "auto")) != "auto":
+        return
+    try:
+        cfg["device"] = "0" if cuda_available() else "cpu"
+    except Exception:
+        # If torch import fails here, ultralytics will error earlier; ignore
+        pass
+
+
+def default_cache(cfg: dict) -> None:
+    # Caching decoded images in RAM is the biggest data-pipeline speedup, so enable it when it fits.
+    # Disk caching is left opt-in: it writes a .npy per image, which low-disk setups can't afford.
+    min_ram_gb = float(cfg.pop("cache_min_ram_gb", _CACHE_MIN_RAM_GB))
+    if "cache" not in cfg:
+        try:
+            import psutil
+            available_gb = psutil.virtual_memory().available / 1024 ** 3
+        except Exception:
+            available_gb = None
+        if available_gb is not None and available_gb >= min_ram_gb:
+            cfg["cache"] = "ram"
+            print(f"cache not set; using cache='ram' ({available_gb:.1f}GB RAM available)")
+    # With AutoBatch (batch=-1, or a fraction 0 < batch < 1 of GPU memory), Ultralytics builds the
+    # dataset (and its RAM cache) once for the batch probe and again for training
+    b = cfg.get("batch")
+    if isinstance(b, (int, float)) and b < 1 and cfg.get("cache") in (True, "ram"):
+        print(f"Warning: batch={b} (AutoBatch) with cache='ram' caches the dataset twice; set a fixed batch to skip the AutoBatch pre-cache pass")
+
+
+def set_cache_threads(cfg: dict) -> None:
+    # Ultralytics fills the image cache with ultralytics.data.base.NUM_THREADS workers (at most 8);
+    # 'cache_threads' in the config overrides it, otherwise large CPUs get up to 32 when caching
+    threads = cfg.pop("cache_threads", None)
+    if threads is None:
+        cpus = os.cpu_count() or 1
+        if not cfg.get("cache") or cpus <= 8:
+            return
+        threads = min(cpus, 32)
+    else:
+        # Ultralytics only uses this once caching starts, where ThreadPool(0) would fail mid-run
+        try:
+            threads = int(threads)
+        except (TypeError, ValueError):
+            raise SystemExit(f"cache_threads must be an integer >= 1, got {threads!r}") from None
+        if threads < 1:
+            raise SystemExit(f"cache_threads must be >= 1, got {threads}")
+    import ultralytics.data.base as _base
+    _base.NUM_THREADS = threads
+    print(f"Using {_base.NUM_THREADS} threads for dataset caching")
+
+
+def default_workers(cfg: dict) -> None:
+    # Dataloader workers: default to the CPU count (capped at 16) rather than relying on
+    # Ultralytics' heuristics, which older releases also capped at the batch size
+    cfg.setdefault("workers", min(os.cpu_count() or 8, 16))
+    print(f"Dataloader workers: {cfg['workers']}")
+
+
+def dataloader_hints(cfg: dict) -> None:
+    # Ultralytics rejects these as train() arguments. Pinned memory (needed for its non_blocking
+    # device copies) is a module flag that defaults to on, and its InfiniteDataLoader already
+    # keeps workers alive across epochs, so map/drop the keys instead of passing them through.
+    if "pin_memory" in cfg:
+        import ultralytics.data.build as _build
+        _build.PIN_MEMORY = bool(cfg.pop("pin_memory"))
+    if cfg.pop("persistent_workers", None) is not None:
+        print("Warning: 'persistent_workers' is ignored; Ultralytics already reuses dataloader workers across epochs")
@@ -7,7 +7,8 @@ would be remapped into the main dataset. Use --apply to perform the copy and to
 `data.yaml` (a backup `data.yaml.bak` will be created).
 
 Usage:
-  python merge_datasets.py        # dry-run
+  python merge_datasets.py        # dry-run (summary only)
+  python merge_datasets.py --verbose  # dry-run, listing every planned operation
   python merge_datasets.py --apply
 
 The script assumes the workspace root is the current directory and expects folders:
@@ -25,20 +26,34 @@ import os
 import shutil
 import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from config_utils import _Loader, load_cached
 
 try:
     import yaml
 except Exception:
     yaml = None
 
+if yaml:
+    # Prefer the libyaml C dumper when PyYAML was built with it (the loader comes from config_utils)
+    _Dumper = yaml.CDumper if hasattr(yaml, 'CDumper') else yaml.Dumper
 
 ROOT = os.path.abspath(os.path.dirname(__file__))
 
+# upper bound on planned ops handed to a worker thread at once during --apply
+APPLY_BATCH_SIZE = 256
+
 
 def load_yaml(path):
+    return load_cached(path, _parse_yaml)
+
+
+def _parse_yaml(path, st=None):
+    # st is passed by load_cached and not needed here
     if yaml:
         with open(path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=_Loader)
     # minimal fallback parser for simple YAML used here
     d = {}
     with open(path, 'r', encoding='utf-8') as f:
@@ -69,12 +84,37 @@ def find_subsets(new_root):
 
 
 def list_files(images_dir, labels_dir):
-    imgs = []
-    if os.path.isdir(images_dir):
-        for fn in os.listdir(images_dir):
-            if fn.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')):
-                imgs.append(fn)
-    return imgs
+    # returns os.DirEntry objects so callers can use entry.name / entry.path without re-joining
+    exts = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+    try:
+        with os.scandir(images_dir) as it:
+            return [e for e in it if e.name.lower().endswith(exts) and e.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _fast_copy(src, dst):
+    # os.copy_file_range lets the filesystem reflink or copy server-side; everything else
+    # (including sendfile on Linux) is already what shutil.copy2 does internally
+    copy_range = getattr(os, 'copy_file_range', None)
+    if copy_range is None:
+        shutil.copy2(src, dst)
+        return
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            remaining = os.fstat(src_fd).st_size
+            while remaining > 0:
+                n = copy_range(src_fd, dst_fd, remaining)
+                if n == 0:
+                    break
+                remaining -= n
+        if remaining > 0:
+            raise OSError('short copy')
+    except OSError:
+        shutil.copy2(src, dst)
+        return
+    shutil.copystat(src, dst)
 
 
 def ensure_dir(d):
@@ -82,7 +122,7 @@ def ensure_dir(d):
         os.makedirs(d, exist_ok=True)
 
 
-def main(dry_run=True):
+def main(dry_run=True, verbose=False):
     root = ROOT
     main_data_yaml = os.path.join(root, 'data.yaml')
     new_data_yaml = os.path.join(root, 'new', 'data.yaml')
@@ -102,8 +142,10 @@ def main(dry_run=True):
     new_names = new_cfg.get('names') or []
 
     merged_names = list(main_names)
+    merged_index = {n: i for i, n in enumerate(merged_names)}
     for n in new_names:
-        if n not in merged_names:
+        if n not in merged_index:
+            merged_index[n] = len(merged_names)
             merged_names.append(n)
 
     print('Main classes ({}):'.format(len(main_names)), main_names)
@@ -111,7 +153,11 @@ def main(dry_run=True):
     print('Merged classes ({}):'.format(len(merged_names)), merged_names)
 
     # mapping for new dataset indices -> merged indices
-    new_to_merged = {i: merged_names.index(name) for i, name in enumerate(new_names)}
+    new_to_merged = {i: merged_index[name] for i, name in enumerate(new_names)}
+    # class id -> merged id as text, built once so each label row is a single list lookup.
+    # ids not listed in new/data.yaml keep their value if within the merged range; new_names
+    # may repeat a name, so it can be longer than merged_names.
+    remap_lut = [str(new_to_merged.get(i, i)) for i in range(max(len(merged_names), len(new_names)))]
 
     # Prepare summary counters
     summary = defaultdict(int)
@@ -130,24 +176,43 @@ def main(dry_run=True):
         ensure_dir(main_images_dir)
         ensure_dir(main_labels_dir)
 
-        for img_name in list_files(new_images_dir, new_labels_dir):
-            src_img = os.path.join(new_images_dir, img_name)
+        # names already taken in the destination, read once instead of a stat per candidate
+        # (normcase keeps the check case-insensitive on Windows, like os.path.exists was)
+        existing = {os.path.normcase(n) for n in os.listdir(main_images_dir)}
+        # label files available for this subset, likewise read once instead of a stat per image
+        try:
+            with os.scandir(new_labels_dir) as it:
+                label_names = {os.path.normcase(e.name) for e in it if e.is_file()}
+        except (FileNotFoundError, NotADirectoryError):
+            label_names = set()
+
+        # the loop below builds paths by plain concatenation onto these prefixes
+        new_labels_prefix = new_labels_dir + os.sep
+        main_images_prefix = main_images_dir + os.sep
+        main_labels_prefix = main_labels_dir + os.sep
+
+        for entry in list_files(new_images_dir, new_labels_dir):
+            img_name = entry.name
+            src_img = entry.path
             stem, ext = os.path.splitext(img_name)
-            dst_img_name = f'new_{img_name}'
-            dst_img = os.path.join(main_images_dir, dst_img_name)
+            dst_stem = f'new_{stem}'
+            dst_img_name = dst_stem + ext
 
-            # ensure unique name
+            # ensure unique name (also against names planned earlier in this run)
             k = 1
-            while os.path.exists(dst_img):
-                dst_img_name = f'new_{stem}_{k}{ext}'
-                dst_img = os.path.join(main_images_dir, dst_img_name)
+            while os.path.normcase(dst_img_name) in existing:
+                dst_stem = f'new_{stem}_{k}'
+                dst_img_name = dst_stem + ext
                 k += 1
+            existing.add(os.path.normcase(dst_img_name))
+            dst_img = main_images_prefix + dst_img_name
 
             # label handling
-            src_lbl = os.path.join(new_labels_dir, stem + '.txt')
-            dst_lbl = os.path.join(main_labels_dir, os.path.splitext(dst_img_name)[0] + '.txt')
+            lbl_name = stem + '.txt'
+            src_lbl = new_labels_prefix + lbl_name
+            dst_lbl = main_labels_prefix + dst_stem + '.txt'
 
-            if os.path.exists(src_lbl):
+            if os.path.normcase(lbl_name) in label_names:
                 # read and remap
                 with open(src_lbl, 'r', encoding='utf-8') as f:
                     lines = [ln.strip() for ln in f if ln.strip()]
@@ -162,34 +227,44 @@ def main(dry_run=True):
                     except Exception:
                         print(f'Warning: cannot parse class id in {src_lbl}: {ln}')
                         continue
-                    if cid in new_to_merged:
-                        new_cid = new_to_merged[cid]
-                    else:
-                        # this can happen if new label references class not in new/data.yaml
-                        # map to same id if within merged range
-                        new_cid = cid if cid < len(merged_names) else None
-                    if new_cid is None:
+                    if not 0 <= cid < len(remap_lut):
                         print(f'Warning: cannot map class id {cid} in {src_lbl}')
                         continue
-                    remapped.append(' '.join([str(new_cid)] + parts[1:]))
+                    parts[0] = remap_lut[cid]
+                    remapped.append(' '.join(parts) + '\n')
+                # keep the encoded result so --apply only has to write it out
+                remapped_bytes = ''.join(remapped).encode('utf-8')
+                planned_ops.append((src_img, dst_img, src_lbl, dst_lbl, remapped_bytes))
             else:
                 remapped = None
+                planned_ops.append((src_img, dst_img, None, None, None))
 
-            planned_ops.append((src_img, dst_img, src_lbl if os.path.exists(src_lbl) else None, dst_lbl if remapped is not None else None))
             summary[subset + '_images'] += 1
             if remapped is not None:
                 summary[subset + '_labels'] += 1
 
-    # report planned operations
-    print('\nPlanned operations:')
-    for src_img, dst_img, src_lbl, dst_lbl in planned_ops:
-        print(f'COPY: {os.path.relpath(src_img, root)} -> {os.path.relpath(dst_img, root)}')
-        if src_lbl and dst_lbl:
-            print(f'  remap label: {os.path.relpath(src_lbl, root)} -> {os.path.relpath(dst_lbl, root)}')
-        elif src_lbl and not dst_lbl:
-            print(f'  label present but could not remap: {os.path.relpath(src_lbl, root)}')
-        else:
-            print('  no label file')
+    # every planned path lives under root, so relpath reduces to stripping the prefix
+    root_prefix = root + os.sep
+
+    def relp(p):
+        return p[len(root_prefix):] if p.startswith(root_prefix) else os.path.relpath(p, root)
+
+    # report planned operations; lines are collected and written once, since per-line
+    # console writes dominate the run time on large merges (notably on Windows)
+    if verbose:
+        out = ['', 'Planned operations:']
+        for src_img, dst_img, src_lbl, dst_lbl, _ in planned_ops:
+            out.append(f'COPY: {relp(src_img)} -> {relp(dst_img)}')
+            if src_lbl and dst_lbl:
+                out.append(f'  remap label: {relp(src_lbl)} -> {relp(dst_lbl)}')
+            elif src_lbl and not dst_lbl:
+                out.append(f'  label present but could not remap: {relp(src_lbl)}')
+            else:
+                out.append('  no label file')
+        sys.stdout.write('\n'.join(out) + '\n')
+        sys.stdout.flush()
+    else:
+        print(f'\nPlanned operations: {len(planned_ops)} (re-run with --verbose to list them)')
 
     print('\nSummary:')
     for k, v in summary.items():
@@ -209,22 +284,28 @@ def main(dry_run=True):
     print('  backed up', main_data_yaml, '->', bak)
 
     # 2) perform copies and write remapped labels
-    for src_img, dst_img, src_lbl, dst_lbl in planned_ops:
-        shutil.copy2(src_img, dst_img)
-        if src_lbl and dst_lbl:
-            # remap label file again (read, remap -> dst_lbl)
-            with open(src_lbl, 'r', encoding='utf-8') as f:
-                lines = [ln.strip() for ln in f if ln.strip()]
-            remapped = []
-            for ln in lines:
-                parts = ln.split()
-                if len(parts) < 5:
-                    continue
-                cid = int(parts[0])
-                new_cid = new_to_merged.get(cid, cid)
-                remapped.append(' '.join([str(new_cid)] + parts[1:]))
-            with open(dst_lbl, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(remapped) + ('\n' if remapped else ''))
+    # (file I/O releases the GIL, so a thread pool hides per-file syscall latency)
+    def _apply_one(op):
+        src_img, dst_img, src_lbl, dst_lbl, remapped_bytes = op
+        _fast_copy(src_img, dst_img)
+        if dst_lbl is not None:
+            # labels were already parsed and remapped during planning
+            with open(dst_lbl, 'wb') as f:
+                f.write(remapped_bytes)
+
+    def _apply_batch(batch):
+        for op in batch:
+            _apply_one(op)
+
+    # submit ops in batches so the pool handles one future per batch, not per file,
+    # while still giving every worker something to do on small merges
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    per_worker = -(-len(planned_ops) // max_workers)
+    batch_size = max(1, min(APPLY_BATCH_SIZE, per_worker))
+    batches = [planned_ops[i:i + batch_size] for i in range(0, len(planned_ops), batch_size)]
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        list(ex.map(_apply_batch, batches))
+    print(f'  copied {len(planned_ops)} images using {max_workers} threads')
 
     # 3) update main data.yaml names and nc
     new_main_cfg = dict(main_cfg)
@@ -233,7 +314,7 @@ def main(dry_run=True):
     # write YAML
     if yaml:
         with open(main_data_yaml, 'w', encoding='utf-8') as f:
-            yaml.dump(new_main_cfg, f, sort_keys=False, allow_unicode=True)
+            yaml.dump(new_main_cfg, f, Dumper=_Dumper, sort_keys=False, allow_unicode=True)
     else:
         # simple writer
         with open(main_data_yaml, 'w', encoding='utf-8') as f:
@@ -252,6 +333,7 @@ def main(dry_run=True):
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--apply', action='store_true', help='Perform copy and update data.yaml')
+    parser.add_argument('--verbose', action='store_true', help='List every planned copy/remap operation')
     args = parser.parse_args()
-    rc = main(dry_run=not args.apply)
+    rc = main(dry_run=not args.apply, verbose=args.verbose)
     sys.exit(rc)
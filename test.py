@@ -12,10 +12,8 @@ from __future__ import annotations
 import datetime
 from pathlib import Path
 
-try:
-    import yaml  # PyYAML
-except Exception as e:
-    raise SystemExit("PyYAML is required. Install with 'pip install pyyaml' or 'pip install -r requirements.txt'") from e
+from config_utils import load_config
+from gpu_utils import default_workers, resolve_device
 
 try:
     from ultralytics import YOLO
@@ -30,17 +28,6 @@ except Exception as e:
     ) from e
 
 
-def load_config(path: str) -> dict:
-    p = Path(path)
-    if not p.exists():
-        raise SystemExit(f"Config file not found: {p}")
-    with p.open("r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f) or {}
-    if not isinstance(cfg, dict):
-        raise SystemExit("Invalid config format: expected a YAML mapping (dict)")
-    return cfg
-
-
 def main() -> None:
     # Zero-argument execution: use default config path
     cfg = load_config("configs/test.yaml")
@@ -53,15 +40,10 @@ def main() -> None:
     if cfg.get("name") in (None, "", "null"):
         cfg["name"] = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     cfg.setdefault("exist_ok", True)
+    default_workers(cfg)
 
     # Resolve device automatically if set to 'auto'
-    try:
-        import torch
-        device = str(cfg.get("device", "auto"))
-        if device == "auto":
-            cfg["device"] = "0" if torch.cuda.is_available() else "cpu"
-    except Exception:
-        pass
+    resolve_device(cfg)
 
     model = YOLO(weights_path)
     results = model.val(**cfg)